@@ -0,0 +1,67 @@
+"""Cached AGB outdoor classification thresholds.
+
+archeryutils works out every threshold from the handicap tables on each call.
+Here they are calculated once per round and category, after which finding a
+classification is a bisect over the sorted scores.
+"""
+
+import bisect
+import functools
+
+from archeryutils.classifications import (
+    AGB_bowstyles,
+    agb_outdoor_classification_scores,
+)
+from archeryutils.classifications.agb_outdoor_classifications import (
+    ALL_OUTDOOR_ROUNDS,
+    _get_outdoor_groupname,
+    agb_outdoor_classifications,
+)
+
+UNAVAILABLE = -9999
+
+
+@functools.lru_cache(maxsize=None)
+def outdoor_thresholds(codename, bowstyle, gender, age_group):
+    """Return `(max_score, scores, classes)` for a round and category.
+
+    `scores` is in ascending order, with `classes` matching it. Rounds which
+    are not eligible for outdoor classifications return None.
+    """
+    try:
+        all_scores = agb_outdoor_classification_scores(
+            codename, AGB_bowstyles(bowstyle.value), gender, age_group
+        )
+    except ValueError:
+        return None
+    groupname = _get_outdoor_groupname(AGB_bowstyles(bowstyle.value), gender, age_group)
+    eligible = [
+        (score, classname)
+        for score, classname in zip(
+            all_scores, agb_outdoor_classifications[groupname]["classes"]
+        )
+        if score != UNAVAILABLE
+    ]
+    eligible.reverse()
+    return (
+        ALL_OUTDOOR_ROUNDS[codename].max_score(),
+        [score for score, classname in eligible],
+        [classname for score, classname in eligible],
+    )
+
+
+def calculate_outdoor_classification(score, archery_round, bowstyle, gender, age_group):
+    """Equivalent to archeryutils' `calculate_agb_outdoor_classification`.
+
+    Raises ValueError for ineligible rounds and impossible scores.
+    """
+    thresholds = outdoor_thresholds(archery_round.codename, bowstyle, gender, age_group)
+    if thresholds is None:
+        raise ValueError("%s is not an outdoor classification round" % archery_round)
+    max_score, scores, classes = thresholds
+    if score < 0 or score > max_score:
+        raise ValueError("Invalid score of %s for a %s" % (score, archery_round.name))
+    index = bisect.bisect_right(scores, score)
+    if not index:
+        return "UC"
+    return classes[index - 1]
@@ -12,19 +12,20 @@ from archeryutils.rounds import Round
 from django_enumfield.enum import Enum as DbEnum
 from django_enumfield.db.fields import EnumField
 
+from .rounds import RoundRegistry
+
 
 class RoundField(models.CharField):
     description = "Choose from a set of archery rounds"
 
     def __init__(self, rounds, **kwargs):
-        self.rounds = rounds
-        self._round_dict = (
-            rounds  # TODO: allow more complex round structures to be passed
-        )
-
         # Handle if the passed rounds are just codenames from a migration.
         if isinstance(rounds, list):
-            self._round_dict = {r: r for r in rounds}
+            rounds = {r: r for r in rounds}
+        elif not isinstance(rounds, RoundRegistry):
+            rounds = RoundRegistry(rounds)
+        self.rounds = rounds
+        self._round_dict = rounds
 
         kwargs.setdefault("max_length", 64)
         super().__init__(**kwargs)
@@ -1,5 +1,4 @@
 from django import forms
-from django.db.models import BLANK_CHOICE_DASH
 
 from archeryutils.rounds import Round
 
@@ -7,10 +6,9 @@ from archeryutils.rounds import Round
 class RoundField(forms.ChoiceField):
     def __init__(self, rounds, **kwargs):
         self.rounds = rounds
-        choices = BLANK_CHOICE_DASH + [
-            (round.codename, round.name) for (codename, round) in rounds.items()
-        ]
-        kwargs.setdefault("choices", choices)
+        # A callable keeps the shared list from being copied for every form,
+        # and from being built before it is first needed.
+        kwargs.setdefault("choices", rounds.get_choices)
         super().__init__(**kwargs)
 
     def clean(self, value):
@@ -0,0 +1,49 @@
+from collections.abc import Mapping
+from functools import cached_property
+
+from django.db.models import BLANK_CHOICE_DASH
+
+
+class RoundRegistry(Mapping):
+    """Rounds by codename, merged from several sources on first use.
+
+    Sources are mappings of codename to `Round`, or callables returning one.
+    Later sources win for duplicate codenames. Every lookup returns the same
+    `Round` instance, and the choices are built once per process.
+    """
+
+    def __init__(self, *sources):
+        self.sources = sources
+
+    @cached_property
+    def rounds(self):
+        rounds = {}
+        for source in self.sources:
+            rounds.update(source() if callable(source) else source)
+        return rounds
+
+    def __getitem__(self, codename):
+        return self.rounds[codename]
+
+    def __iter__(self):
+        return iter(self.rounds)
+
+    def __len__(self):
+        return len(self.rounds)
+
+    def __contains__(self, codename):
+        return codename in self.rounds
+
+    def __deepcopy__(self, memo):
+        # Form fields are deep-copied for every form, and with them the bound
+        # `get_choices`. The registry is shared, so copying it would be waste.
+        return self
+
+    @cached_property
+    def choices(self):
+        return BLANK_CHOICE_DASH + [
+            (codename, round.name) for codename, round in self.rounds.items()
+        ]
+
+    def get_choices(self):
+        return self.choices
@@ -0,0 +1,8 @@
+from django.apps import AppConfig
+
+
+class ScaytConfig(AppConfig):
+    name = "scayt"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,15 @@
+from .seasons import get_seasons
+
+
+def seasons(request):
+    """Provide `current_season` and `previous_seasons`, evaluated lazily.
+
+    `archived` is set for pages rendered by `export_season`, which must not
+    show anything about whichever season is current at the time.
+    """
+    seasons = get_seasons(request)
+    return {
+        "current_season": seasons.current,
+        "previous_seasons": seasons.previous,
+        "archived": getattr(request, "archived", False),
+    }
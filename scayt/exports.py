@@ -0,0 +1,123 @@
+"""Stream standings and results as CSV or JSON.
+
+Rows are read with `QuerySet.iterator()` and written out as they arrive, so
+an export of any size uses a constant amount of memory.
+"""
+
+import csv
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import StreamingHttpResponse
+
+CHUNK_SIZE = 500
+
+CONTENT_TYPES = {
+    "csv": "text/csv",
+    "json": "application/json",
+}
+
+STANDING_COLUMNS = [
+    "season",
+    "bowstyle",
+    "age_group",
+    "gender",
+    "placing",
+    "final_placing",
+    "archer",
+    "club",
+    "total_points",
+    "event_count",
+]
+
+RESULT_COLUMNS = [
+    "season",
+    "event",
+    "date",
+    "division",
+    "round",
+    "placing",
+    "archer",
+    "club",
+    "score",
+    "golds",
+    "hits",
+    "xs",
+    "classification",
+    "classification_2",
+    "scayt_points",
+]
+
+
+class Echo:
+    """A file-like object for `csv.writer` which returns each line written."""
+
+    def write(self, value):
+        return value
+
+
+def stream_csv(columns, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(columns)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def stream_json(columns, rows):
+    """Write a JSON list of objects, one line per row."""
+    yield "["
+    for i, row in enumerate(rows):
+        yield (",\n" if i else "\n") + json.dumps(
+            dict(zip(columns, row)), cls=DjangoJSONEncoder
+        )
+    yield "\n]\n"
+
+
+def standing_rows(standings):
+    standings = standings.select_related("season", "archer_season__archer")
+    for standing in standings.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            standing.season.year,
+            str(standing.bowstyle),
+            str(standing.age_group or ""),
+            str(standing.gender),
+            standing.placing,
+            standing.final_placing,
+            str(standing.archer_season.archer),
+            standing.archer_season.club,
+            standing.total_points,
+            standing.event_count,
+        ]
+
+
+def result_rows(results):
+    results = results.select_related("event__season", "archer_season__archer")
+    for result in results.iterator(chunk_size=CHUNK_SIZE):
+        yield [
+            result.event.season.year,
+            result.event.name,
+            result.event.date,
+            result.division,
+            result.round_name,
+            result.placing,
+            str(result.archer_season.archer),
+            result.archer_season.club,
+            result.score,
+            result.golds,
+            result.hits,
+            result.xs,
+            result.classification,
+            result.classification_2,
+            result.scayt_points,
+        ]
+
+
+def export_response(filename, format, columns, rows):
+    stream = stream_csv if format == "csv" else stream_json
+    return StreamingHttpResponse(
+        stream(columns, rows),
+        content_type=CONTENT_TYPES[format],
+        headers={
+            "Content-Disposition": 'attachment; filename="%s.%s"' % (filename, format)
+        },
+    )
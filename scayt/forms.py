@@ -1,17 +1,29 @@
 import io
 
 from django import forms
+from django.conf import settings
 from django.contrib.admin.helpers import Fieldset
 
 
+def provider_choices():
+    return [("", "Other")] + [(name, name) for name in settings.ROUND_ALIASES]
+
+
 class ImportUploadForm(forms.Form):
     file = forms.FileField(help_text="CSV format")
-    _fieldsets = [(None, {"fields": ["file"]})]
+    provider = forms.ChoiceField(
+        choices=provider_choices,
+        required=False,
+        help_text="The results service which produced the file, whose round "
+        "names are then recognised.",
+    )
+    _fieldsets = [(None, {"fields": ["file", "provider"]})]
 
     def clean_file(self):
-        file = self.cleaned_data["file"]
-        decoded_file = file.read().decode("utf-8")
-        return io.StringIO(decoded_file)
+        # Decode as the CSV is read, rather than holding a second copy.
+        return io.TextIOWrapper(
+            self.cleaned_data["file"].file, encoding="utf-8", newline=""
+        )
 
     @property
     def fieldsets(self):
@@ -27,54 +39,84 @@ class ImportUploadForm(forms.Form):
         ]
 
 
-class ImportConfirmForm(forms.Form):
-    raw = forms.CharField(widget=forms.HiddenInput())
-
-    def clean_raw(self):
-        data = self.cleaned_data["raw"]
-        return io.StringIO(data)
-
-    def __init__(self, raw=None, archer_data=None, **kwargs):
-        initial = kwargs.get("initial", {})
-        initial.update(
-            {
-                "raw": raw,
-            }
+class NewArcherForm(forms.Form):
+    year = forms.IntegerField(
+        label="Year of Birth",
+        min_value=2000,
+        max_value=2100,
+    )
+    is_scas_member = forms.BooleanField(
+        label="Is SCAS Member?",
+        initial=True,
+        required=False,
+    )
+
+    def __init__(self, *args, archer, **kwargs):
+        self.archer = archer
+        super().__init__(*args, **kwargs)
+
+    def clean(self):
+        cleaned_data = super().clean()
+        if "year" in cleaned_data:
+            self.archer.year = cleaned_data["year"]
+            self.archer.is_scas_member = cleaned_data["is_scas_member"]
+        return cleaned_data
+
+    @property
+    def fieldset(self):
+        return Fieldset(
+            form=self,
+            name=self.archer.name,
+            fields=["year", "is_scas_member"],
         )
-        kwargs["initial"] = initial
 
-        self._fieldsets = [(None, {"fields": ["raw"]})]
-        for row in archer_data:
-            if not row["archer"].pk:
-                year_field_name = "%s_year" % row["archer"].agb_number
-                scas_field_name = "%s_is_scas_member" % row["archer"].agb_number
-                self.base_fields[year_field_name] = forms.IntegerField(
-                    label="Year of Birth",
-                    min_value=2000,
-                    max_value=2100,
-                )
-                self.base_fields[scas_field_name] = forms.BooleanField(
-                    label="Is SCAS Member?",
-                    initial=True,
-                    required=False,
-                )
-                row["fieldset"] = Fieldset(
-                    form=self,
-                    name=row["archer"].name,
-                    fields=[year_field_name, scas_field_name],
-                )
 
-        self.archer_data = archer_data
+class BaseNewArcherFormSet(forms.BaseFormSet):
+    """One form for each archer being created by an import."""
+
+    def __init__(self, *args, archers, **kwargs):
+        self.archers = archers
+        super().__init__(*args, **kwargs)
 
+    def total_form_count(self):
+        return len(self.archers)
+
+    def get_form_kwargs(self, index):
+        return {"archer": self.archers[index]}
+
+
+NewArcherFormSet = forms.formset_factory(
+    NewArcherForm, formset=BaseNewArcherFormSet, extra=0
+)
+
+
+class ImportConfirmForm(forms.Form):
+    def __init__(self, archer_data=None, **kwargs):
         super().__init__(**kwargs)
+        self._fieldsets = []
+        self.archer_data = archer_data
 
-    def clean(self):
-        for row in self.archer_data:
-            if not row["archer"].pk:
-                archer = row["archer"]
-                agb = archer.agb_number
-                archer.year = self.cleaned_data["%s_year" % agb]
-                archer.is_scas_member = self.cleaned_data["%s_is_scas_member" % agb]
+        # Rows for the same new archer share one instance, and one form.
+        archers = {
+            id(row["archer"]): row["archer"]
+            for row in archer_data
+            if not row["archer"].pk
+        }
+        self.new_archers = NewArcherFormSet(
+            self.data if self.is_bound else None,
+            prefix="archers",
+            archers=list(archers.values()),
+        )
+        # The rows to display, each with the fieldset for a new archer.
+        self.rows = []
+        forms_by_archer = {id(form.archer): form for form in self.new_archers}
+        for row in archer_data:
+            form = forms_by_archer.pop(id(row["archer"]), None)
+            self.rows.append(dict(row, fieldset=form.fieldset if form else None))
+
+    def is_valid(self):
+        valid = super().is_valid()
+        return self.new_archers.is_valid() and valid
 
     @property
     def fieldsets(self):
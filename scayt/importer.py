@@ -0,0 +1,383 @@
+"""Import event results from a CSV file.
+
+Archers, archer seasons and existing results are looked up in bulk for the
+whole file, and new rows are written with `bulk_create`. Files are resolved
+and saved on a background thread, reporting progress on their `ImportBatch`.
+"""
+
+import csv
+import difflib
+import functools
+import io
+import logging
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+from archerydjango.fields import DbAges, DbBowstyles, DbGender
+
+from . import standings
+from .models import Archer, ArcherSeason, ImportBatch, Result, Season, rounds
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 50
+
+# Round names used in results files, mapped to codenames.
+ROUND_ALIASES = {
+    "WA 70m": "wa720_70",
+    "WA 60m": "wa720_60",
+    "WA 50m Compound": "wa720_50_c",
+    "WA 50m Barebow": "wa720_50_b",
+    "Metric 122-50": "metric_122_50",
+    "Metric 122-40": "metric_122_40",
+    "Metric 122-30": "metric_122_30",
+    "Metric 80-40": "metric_80_40",
+    "Metric 80-30": "metric_80_30",
+    "WA 1440 70m": "wa1440_70",
+    "WA 1440 60m": "wa1440_60",
+    "Metric II": "metric_ii",
+    "Metric III": "metric_iii",
+    "Metric IV": "metric_iv",
+    "Metric V": "metric_v",
+    "Short Metric I": "short_metric_i",
+    "Short Metric II": "short_metric_ii",
+    "Short Metric III": "short_metric_iii",
+    "Short Metric IV": "short_metric_iv",
+    "Short Metric V": "short_metric_v",
+    "WA900": "wa900",
+    "900-50": "agb900_50",
+    "900-40": "agb900_40",
+    "900-30": "agb900_30",
+    "York": "york",
+    "Hereford": "hereford",
+    "Bristol I": "bristol_i",
+    "Bristol II": "bristol_ii",
+    "Bristol III": "bristol_iii",
+    "Bristol IV": "bristol_iv",
+    "Bristol V": "bristol_v",
+    "Western": "western",
+    "Western 50": "western_50",
+    "Western 40": "western_40",
+    "Western 30": "western_30",
+    "Western 20": "western_20",
+    "Albion": "albion",
+    "Windsor": "windsor",
+    "Windsor 50": "windsor_50",
+    "Windsor 40": "windsor_40",
+    "Windsor 30": "windsor_30",
+}
+
+DOUBLE_ROUND = re.compile(r"^(?:double\s+|2\s*x\s*)")
+
+
+def normalise_round_name(name):
+    return " ".join(name.lower().split())
+
+
+def split_double_round(name):
+    """Return the normalised name and whether it was shot twice."""
+    name = normalise_round_name(name)
+    single = DOUBLE_ROUND.sub("", name, count=1)
+    return single, single != name
+
+
+@functools.cache
+def round_index(provider=None):
+    """Rounds by normalised codename, display name and alias.
+
+    Aliases for a results provider come from `settings.ROUND_ALIASES`.
+    """
+    index = {}
+    for codename, archery_round in rounds.items():
+        index[normalise_round_name(codename)] = archery_round
+        index[normalise_round_name(archery_round.name)] = archery_round
+    aliases = ROUND_ALIASES | settings.ROUND_ALIASES.get(provider, {})
+    for alias, codename in aliases.items():
+        index[normalise_round_name(alias)] = rounds[codename]
+    return index
+
+
+def find_round(name, provider=None):
+    """Return `(round, double)`, with round None when nothing matches."""
+    name, double = split_double_round(name)
+    return round_index(provider).get(name), double
+
+
+def suggest_rounds(name, provider=None, limit=3):
+    """Return display names of the closest rounds, best first."""
+    name = split_double_round(name)[0]
+    index = round_index(provider)
+    suggestions = []
+    for match in difflib.get_close_matches(name, index, n=limit * 3):
+        if index[match].name not in suggestions:
+            suggestions.append(index[match].name)
+    return suggestions[:limit]
+
+
+def _int(value):
+    if value is None or value == "":
+        return None
+    return int(value)
+
+
+def _unique(instances):
+    return list({id(instance): instance for instance in instances}.values())
+
+
+@functools.cache
+def _executor():
+    # A single thread, so that two imports never race to create an archer.
+    return ThreadPoolExecutor(max_workers=1, thread_name_prefix="import")
+
+
+def run_in_background(batch, action):
+    """Run `ResultImporter.<action>(batch)` on the import thread.
+
+    The job starts once the current transaction commits, so that it can see
+    the batch.
+    """
+    transaction.on_commit(lambda: _executor().submit(_run, batch.pk, action))
+
+
+def _run(pk, action):
+    try:
+        batch = ImportBatch.objects.select_related("event").get(pk=pk)
+        try:
+            importer = ResultImporter(
+                batch.event, provider=batch.provider or None, batch=batch
+            )
+            getattr(importer, action)(batch)
+        except Exception as e:
+            logger.exception("Import %s failed", batch.token)
+            ImportBatch.objects.filter(pk=pk).update(status="failed", error=str(e))
+    finally:
+        connections.close_all()
+
+
+class ResultImporter:
+    def __init__(self, event, provider=None, batch=None):
+        self.event = event
+        self.provider = provider
+        self.batch = batch
+
+    def report(self, **progress):
+        """Record progress on the batch being imported, if there is one."""
+        if self.batch is not None:
+            ImportBatch.objects.filter(pk=self.batch.pk).update(**progress)
+
+    def stage(self, file):
+        """Create an ImportBatch for `file` and resolve it in the background."""
+        ImportBatch.objects.expired().delete()
+        batch = ImportBatch.objects.create(
+            event=self.event, provider=self.provider or "", source=file.read()
+        )
+        run_in_background(batch, "stage_batch")
+        return batch
+
+    def stage_batch(self, batch):
+        batch.set_rows(self.translate(io.StringIO(batch.source)))
+        batch.source = ""
+        batch.status = "staged"
+        batch.save(update_fields=["data", "source", "status"])
+
+    def confirm(self, batch, data):
+        """Save a staged batch in the background, with the admin's changes.
+
+        Returns False if the batch has already been confirmed.
+        """
+        batch.set_rows(data)
+        confirmed = ImportBatch.objects.filter(pk=batch.pk, status="staged").update(
+            status="saving", data=batch.data
+        )
+        if confirmed:
+            run_in_background(batch, "save_batch")
+        return bool(confirmed)
+
+    def save_batch(self, batch):
+        self.save(batch.rows)
+
+    def translate(self, file):
+        rows = list(csv.DictReader(file))
+        self.report(rows_parsed=len(rows))
+        self.prefetch({row["AGB Number"] for row in rows})
+        data = []
+        for i, row in enumerate(rows, 1):
+            if not i % PROGRESS_INTERVAL:
+                self.report(rows_resolved=i)
+            archer = self.find_archer(row)
+            season = self.find_season(row, archer["instance"])
+            result = self.find_result(row, season["instance"])
+            all_messages = archer["messages"] + season["messages"] + result["messages"]
+            data.append(
+                {
+                    "errors": [
+                        message["message"]
+                        for message in all_messages
+                        if message["level"] == "error"
+                    ],
+                    "messages": all_messages,
+                    "archer": archer["instance"],
+                    "season": season["instance"],
+                    "result": result["instance"],
+                }
+            )
+        self.report(rows_resolved=len(rows))
+        return data
+
+    def prefetch(self, agb_numbers):
+        """Load everything the file refers to in three queries."""
+        self.archers = {}
+        for archer in Archer.objects.filter(agb_number__in=agb_numbers):
+            self.archers.setdefault(archer.agb_number, archer)
+        archers_by_pk = {archer.pk: archer for archer in self.archers.values()}
+
+        self.seasons = {}
+        for season in ArcherSeason.objects.filter(
+            season=self.event.season,
+            archer__in=archers_by_pk,
+        ):
+            season.archer = archers_by_pk[season.archer_id]
+            season.season = self.event.season
+            self.seasons.setdefault((season.archer.agb_number, season.bowstyle), season)
+        seasons_by_pk = {season.pk: season for season in self.seasons.values()}
+
+        self.results = {}
+        for result in Result.objects.filter(
+            event=self.event,
+            archer_season__in=seasons_by_pk,
+        ):
+            result.archer_season = seasons_by_pk[result.archer_season_id]
+            result.event = self.event
+            self.results.setdefault(result.archer_season_id, result)
+
+    def find_archer(self, row):
+        messages = []
+        archer = self.archers.get(row["AGB Number"])
+        if archer is None:
+            archer = Archer(
+                agb_number=row["AGB Number"],
+                forename=row["Name"].split(" ", 1)[0],
+                surname=row["Name"].split(" ", 1)[1],
+                gender=DbGender.__lookup__[row["Gender"]],
+            )
+            self.archers[archer.agb_number] = archer
+        if archer.pk:
+            messages.append(
+                {
+                    "message": "Found archer",
+                    "level": "success",
+                }
+            )
+        else:
+            messages.append(
+                {
+                    "message": "Creating new archer",
+                    "level": "warning",
+                }
+            )
+        return {"instance": archer, "messages": messages}
+
+    def find_season(self, row, archer):
+        bowstyle = DbBowstyles.__lookup__[row["BowStyle"]]
+        messages = []
+        season = self.seasons.get((archer.agb_number, bowstyle))
+        if season is None:
+            season = ArcherSeason(
+                archer=archer,
+                season=self.event.season,
+                bowstyle=bowstyle,
+                club=row["Club"],
+            )
+            self.seasons[(archer.agb_number, bowstyle)] = season
+        if season.pk:
+            messages.append(
+                {
+                    "message": "Found season",
+                    "level": "success",
+                }
+            )
+        else:
+            messages.append(
+                {
+                    "message": "Creating new archer season",
+                    "level": "warning",
+                }
+            )
+        return {"instance": season, "messages": messages}
+
+    def find_result(self, row, season):
+        messages = []
+        result = self.results.get(season.pk) if season.pk else None
+        if result is not None:
+            messages.append(
+                {
+                    "message": "Result already exists!",
+                    "level": "error",
+                }
+            )
+            return {"instance": result, "messages": messages}
+
+        round_name = row["Round"]
+        shot_round, double = find_round(round_name, self.provider)
+        shot_round_2 = shot_round if double else None
+        if not shot_round:
+            message = "Round not found for %s" % round_name
+            suggestions = suggest_rounds(round_name, self.provider)
+            if suggestions:
+                message += " - did you mean %s?" % " or ".join(suggestions)
+            messages.append(
+                {
+                    "message": message,
+                    "level": "error",
+                }
+            )
+        result = Result(
+            archer_season=season,
+            event=self.event,
+            placing=_int(row["Placing"]),
+            age_group_competed=DbAges.__lookup__[row["Age Group"]],
+            shot_round=shot_round,
+            shot_round_2=shot_round_2,
+            score=_int(row["Score"]),
+            golds=_int(row.get("10+X", row.get("Golds"))),
+            hits=_int(row.get("Hits")),
+            xs=_int(row.get("X")),
+            pass_1=_int(row.get("1st Distance")),
+            pass_2=_int(row.get("2nd Distance")),
+            pass_3=_int(row.get("3rd Distance")),
+            pass_4=_int(row.get("4th Distance")),
+        )
+        if not messages:
+            messages.append(
+                {
+                    "message": "Creating new result",
+                    "level": "success",
+                }
+            )
+        return {"instance": result, "messages": messages}
+
+    def save(self, data):
+        archers = _unique(row["archer"] for row in data if not row["archer"].pk)
+        seasons = _unique(row["season"] for row in data if not row["season"].pk)
+        results = [row["result"] for row in data if not row["result"].pk]
+        # Classifications are calculated before the transaction, as it would
+        # hide any progress reported during it, so rows count as saved once
+        # calculated. The inserts and standings then land with "done".
+        for season in seasons:
+            season.fill_calculated_fields()
+        for i, result in enumerate(results, 1):
+            if not i % PROGRESS_INTERVAL:
+                self.report(rows_saved=i)
+            result.fill_calculated_fields()
+        with transaction.atomic():
+            Archer.objects.bulk_create(archers)
+            ArcherSeason.objects.bulk_create(seasons)
+            Result.objects.bulk_create(results, batch_size=500)
+            standings.update_divisions(
+                {standings.division_key(result.archer_season) for result in results}
+            )
+            Season.objects.filter(pk=self.event.season_id).bump_revision()
+            self.report(status="done", rows_saved=len(results))
@@ -0,0 +1,294 @@
+import csv
+import io
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import Client
+from django.urls import reverse
+
+from archerydjango.fields import DbAges, DbBowstyles, DbGender
+from scayt.importer import ResultImporter
+from scayt.models import ArcherSeason, Event, ImportBatch, Season, Standing
+from scayt.pages import division_kwargs
+
+
+class QueryCounter:
+    """Count queries, which the test client's reset of `connection.queries`
+    would hide from `CaptureQueriesContext`."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure wall time, queries and peak memory for every public view and "
+        "for importing results, using the busiest pages of a season."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int, nargs="?")
+        parser.add_argument("--repeat", type=int, default=5)
+        parser.add_argument(
+            "--cache",
+            action="store_true",
+            help="Leave the page cache enabled between runs.",
+        )
+
+    def handle(self, *args, year, repeat, cache, **options):
+        if year is None:
+            season = Season.objects.first()
+        else:
+            season = Season.objects.filter(year=year).first()
+        if season is None:
+            raise CommandError("Unknown season: %s" % year)
+        self.repeat = repeat
+        self.use_cache = cache
+        self.client = Client(HTTP_HOST="localhost")
+
+        self.stdout.write("Benchmarking the %s" % season)
+        self.stdout.write(
+            "%-32s %10s %8s %10s" % ("", "median ms", "queries", "peak KiB")
+        )
+        for name, path in self.get_pages(season):
+            self.measure(name, lambda: self.get(path))
+        self.measure_import(season)
+
+    def get_pages(self, season):
+        year = {"year": season.year}
+        division = self.busiest_division(season)
+        event = (
+            season.event_set.annotate(results=Count("result"))
+            .order_by("-results", "pk")
+            .first()
+        )
+        archer_season = (
+            season.archerseason_set.annotate(results=Count("result"))
+            .order_by("-results", "pk")
+            .first()
+        )
+        pages = [
+            ("Root", reverse("root")),
+            ("FAQs", reverse("faqs")),
+            # reverse() prefers the calendar to the bare year redirect.
+            ("YearRedirect", "/%s/" % season.year),
+            ("Calendar", reverse("calendar", kwargs=year)),
+            ("Standings", reverse("standings", kwargs=year)),
+            ("FinalStandings", reverse("final-standings", kwargs=year)),
+            ("DivisionStandings", reverse("division-standings", kwargs=division)),
+            ("StandingsData", reverse("standings-data", kwargs=year)),
+            (
+                "StandingsExport",
+                reverse("standings-export", kwargs={**year, "format": "csv"}),
+            ),
+            (
+                "StandingsExport (division)",
+                reverse(
+                    "division-standings-export", kwargs={**division, "format": "csv"}
+                ),
+            ),
+            (
+                "ResultsExport (csv)",
+                reverse("results-export", kwargs={**year, "format": "csv"}),
+            ),
+            (
+                "ResultsExport (json)",
+                reverse("results-export", kwargs={**year, "format": "json"}),
+            ),
+        ]
+        if event:
+            pages.append(
+                ("EventResults", reverse("event-results", kwargs={"pk": event.pk}))
+            )
+            pages.append(
+                (
+                    "ResultsExport (event)",
+                    reverse(
+                        "event-results-export",
+                        kwargs={"pk": event.pk, "format": "csv"},
+                    ),
+                )
+            )
+        if archer_season:
+            pages.append(
+                (
+                    "IndividualStandings",
+                    reverse("individual-standings", kwargs={"pk": archer_season.pk}),
+                )
+            )
+        return pages
+
+    def busiest_division(self, season):
+        busiest = (
+            Standing.objects.filter(season=season)
+            .values("bowstyle", "age_group", "gender")
+            .annotate(archers=Count("pk"))
+            .order_by("-archers")
+            .first()
+        )
+        for kwargs in division_kwargs():
+            if busiest is None or (
+                DbBowstyles.__lookup__[kwargs["bow"]] == busiest["bowstyle"]
+                and DbAges.__lookup__["U" + kwargs["age"]] == busiest["age_group"]
+                and DbGender.__lookup__[kwargs["gender"]] == busiest["gender"]
+            ):
+                return {"year": season.year, **kwargs}
+
+    def get(self, path):
+        response = self.client.get(path)
+        if response.status_code not in (200, 301, 302):
+            raise CommandError("%s returned %s" % (path, response.status_code))
+        if response.streaming:
+            # Exports run their queries as the content is read.
+            for chunk in response.streaming_content:
+                pass
+        return response
+
+    def measure(self, name, func, setup=None):
+        """Run `func` several times, each in a transaction that is rolled back.
+
+        `setup`, if given, runs first in the same transaction and its result is
+        passed to `func`, without being measured.
+        """
+        times = []
+        for _ in range(self.repeat):
+            with transaction.atomic():
+                args = self.prepare(setup)
+                queries = QueryCounter()
+                with connection.execute_wrapper(queries):
+                    start = time.perf_counter()
+                    func(*args)
+                    times.append(time.perf_counter() - start)
+                transaction.set_rollback(True)
+        # Measure memory separately, as tracing slows everything down.
+        with transaction.atomic():
+            args = self.prepare(setup)
+            tracemalloc.start()
+            func(*args)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            transaction.set_rollback(True)
+        self.stdout.write(
+            "%-32s %10.1f %8d %10d"
+            % (name, statistics.median(times) * 1000, queries.count, peak // 1024)
+        )
+
+    def prepare(self, setup):
+        if not self.use_cache:
+            cache.clear()
+        return () if setup is None else (setup(),)
+
+    def measure_import(self, season):
+        event = (
+            season.event_set.annotate(results=Count("result"))
+            .order_by("-results", "pk")
+            .first()
+        )
+        if event is None:
+            return
+        source = self.results_csv(event)
+
+        def new_event():
+            # Importing the busiest event's results again, as a new event.
+            copy = Event.objects.get(pk=event.pk)
+            copy.pk = None
+            copy.save()
+            return copy
+
+        def log_in():
+            user = User.objects.create_superuser("benchmark", "", None)
+            self.client.force_login(user)
+
+        def new_event_logged_in():
+            log_in()
+            return new_event()
+
+        def upload(copy):
+            file = io.BytesIO(source.encode())
+            file.name = "results.csv"
+            self.client.post(
+                reverse("admin:scayt_event_import", kwargs={"pk": copy.pk}),
+                {"file": file},
+            )
+
+        def translate(copy):
+            ResultImporter(copy).translate(io.StringIO(source))
+
+        def stage():
+            copy = new_event()
+            batch = ImportBatch.objects.create(event=copy, source=source)
+            ResultImporter(copy).stage_batch(batch)
+            log_in()
+            return batch
+
+        def confirm_page(batch):
+            self.get(
+                reverse(
+                    "admin:scayt_event_import_confirm",
+                    kwargs={"pk": batch.event_id, "token": batch.token},
+                )
+            )
+
+        def save(batch):
+            ResultImporter(batch.event).save(batch.rows)
+
+        self.stdout.write("Importing %s rows" % event.results)
+        self.measure("ImportResultsView (upload)", upload, new_event_logged_in)
+        self.measure("Import: resolve rows", translate, new_event)
+        self.measure("ConfirmImportView", confirm_page, stage)
+        self.measure("Import: save rows", save, stage)
+
+    def results_csv(self, event):
+        bowstyles = {v: k for k, v in DbBowstyles.__lookup__.items() if len(k) > 1}
+        genders = {v: k for k, v in DbGender.__lookup__.items()}
+        ages = {v: k for k, v in DbAges.__lookup__.items()}
+        file = io.StringIO()
+        writer = csv.writer(file)
+        writer.writerow(
+            [
+                "AGB Number",
+                "Name",
+                "Gender",
+                "BowStyle",
+                "Club",
+                "Round",
+                "Placing",
+                "Age Group",
+                "Score",
+                "Golds",
+                "Hits",
+                "1st Distance",
+                "2nd Distance",
+            ]
+        )
+        archer_seasons = ArcherSeason.objects.filter(result__event=event)
+        for archer_season in archer_seasons.select_related("archer"):
+            result = archer_season.result_set.get(event=event)
+            writer.writerow(
+                [
+                    archer_season.archer.agb_number,
+                    archer_season.archer.name,
+                    genders[archer_season.archer.gender],
+                    bowstyles[archer_season.bowstyle],
+                    archer_season.club,
+                    result.shot_round.name,
+                    result.placing,
+                    ages[result.age_group_competed],
+                    result.score,
+                    result.golds,
+                    result.hits,
+                    result.pass_1,
+                    result.pass_2,
+                ]
+            )
+        return file.getvalue()
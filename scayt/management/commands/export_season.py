@@ -0,0 +1,48 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+from django.urls import resolve
+from whitenoise.compress import Compressor
+
+from scayt.models import Season
+from scayt.pages import season_paths
+
+
+class Command(BaseCommand):
+    help = (
+        "Render every page of a finished season into ARCHIVE_ROOT, where "
+        "WhiteNoise serves them without reaching the views."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int)
+
+    def handle(self, *args, year, **options):
+        try:
+            season = Season.objects.get(year=year)
+        except Season.DoesNotExist:
+            raise CommandError("Unknown season: %s" % year)
+        if season.is_current:
+            raise CommandError("The %s is still in progress" % season)
+
+        root = Path(settings.ARCHIVE_ROOT)
+        factory = RequestFactory()
+        compressor = Compressor(quiet=True)
+        paths = season_paths(season)
+        for path in paths:
+            match = resolve(path)
+            request = factory.get(path)
+            # Leaves out the current season from the navigation, and skips
+            # the page cache, whose copies do include it.
+            request.archived = True
+            response = match.func(request, *match.args, **match.kwargs)
+            response.render()
+            if response.status_code != 200:
+                raise CommandError("%s returned %s" % (path, response.status_code))
+            filename = root / path.strip("/") / "index.html"
+            filename.parent.mkdir(parents=True, exist_ok=True)
+            filename.write_bytes(response.content)
+            compressor.compress(str(filename))
+        self.stdout.write("Exported %s pages for the %s" % (len(paths), season))
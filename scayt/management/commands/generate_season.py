@@ -0,0 +1,163 @@
+import datetime
+import random
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+
+from archerydjango.fields import DbAges, DbBowstyles, DbGender
+from scayt import standings
+from scayt.models import (
+    POINTS_SYSTEMS,
+    Archer,
+    ArcherSeason,
+    Event,
+    Result,
+    Season,
+    Venue,
+    rounds,
+)
+
+# The ages an archer in each age group turns during the season, and the
+# round they shoot. Compound archers all shoot the 50m compound round.
+AGE_GROUPS = {
+    DbAges.AGE_UNDER_21: ((19, 20), "wa720_70"),
+    DbAges.AGE_UNDER_18: ((16, 17), "wa720_60"),
+    DbAges.AGE_UNDER_16: ((15,), "metric_122_50"),
+    DbAges.AGE_UNDER_15: ((14,), "metric_122_40"),
+    DbAges.AGE_UNDER_14: ((12, 13), "metric_122_40"),
+    DbAges.AGE_UNDER_12: ((10, 11), "metric_122_30"),
+}
+COMPOUND_ROUND = "wa720_50_c"
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a synthetic season, with archers in every junior division, "
+        "for load testing and benchmarks."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("year", type=int)
+        parser.add_argument(
+            "--archers", type=int, default=10, help="Archers in each division."
+        )
+        parser.add_argument("--events", type=int, default=12)
+        parser.add_argument(
+            "--attendance",
+            type=float,
+            default=0.6,
+            help="Chance of each archer shooting each event.",
+        )
+        parser.add_argument(
+            "--points-system",
+            choices=[code for code, label in POINTS_SYSTEMS],
+            default=POINTS_SYSTEMS[-1][0],
+        )
+        parser.add_argument("--seed", type=int)
+
+    def handle(self, *args, year, points_system, seed, **options):
+        if Season.objects.filter(year=year).exists():
+            raise CommandError("A %s season already exists" % year)
+        self.random = random.Random(seed)
+        with transaction.atomic():
+            season = Season.objects.create(year=year, points_system=points_system)
+            events = self.create_events(season, options["events"])
+            divisions = self.create_archer_seasons(season, options["archers"])
+            results = self.create_results(events, divisions, options["attendance"])
+            standings.rebuild_season(season)
+        self.stdout.write(
+            "Generated %s archers, %s events and %s results for the %s"
+            % (
+                sum(len(division) for division in divisions),
+                len(events),
+                len(results),
+                season,
+            )
+        )
+
+    def create_events(self, season, count):
+        venue, _ = Venue.objects.get_or_create(
+            host_club_name="Synthetic Archers", defaults={"post_code": "SO14 7LY"}
+        )
+        start = datetime.date(season.year, 4, 1)
+        events = [
+            Event(
+                season=season,
+                venue=venue,
+                name="Synthetic Shoot %s" % (i + 1),
+                date=start + datetime.timedelta(days=i * 180 // count),
+                round_family="720",
+                is_final=i == count - 1,
+            )
+            for i in range(count)
+        ]
+        return Event.objects.bulk_create(events)
+
+    def create_archer_seasons(self, season, count):
+        """Create `count` archers in every division, returning them by division."""
+        archers = []
+        divisions = []
+        for bowstyle in DbBowstyles:
+            for age_group, (ages, _) in AGE_GROUPS.items():
+                for gender in DbGender:
+                    division = []
+                    for _ in range(count):
+                        number = len(archers) + 1
+                        archer = Archer(
+                            agb_number="%s%06d" % (season.year, number),
+                            forename="Archer",
+                            surname="%s-%s" % (season.year, number),
+                            gender=gender,
+                            year=season.year - self.random.choice(ages),
+                            is_scas_member=True,
+                        )
+                        archers.append(archer)
+                        division.append(
+                            ArcherSeason(
+                                archer=archer,
+                                season=season,
+                                bowstyle=bowstyle,
+                                club="Synthetic Archers",
+                                age_group=age_group,
+                            )
+                        )
+                    divisions.append(division)
+        Archer.objects.bulk_create(archers)
+        ArcherSeason.objects.bulk_create(
+            [archer_season for division in divisions for archer_season in division]
+        )
+        return divisions
+
+    def create_results(self, events, divisions, attendance):
+        results = []
+        for event in events:
+            for division in divisions:
+                entrants = [s for s in division if self.random.random() < attendance]
+                if not entrants:
+                    continue
+                if entrants[0].bowstyle == DbBowstyles.COMPOUND:
+                    shot_round = rounds[COMPOUND_ROUND]
+                else:
+                    shot_round = rounds[AGE_GROUPS[entrants[0].age_group][1]]
+                max_score = shot_round.max_score()
+                scores = sorted(
+                    (int(max_score * self.random.uniform(0.3, 0.95)) for _ in entrants),
+                    reverse=True,
+                )
+                for placing, (archer_season, score) in enumerate(
+                    zip(entrants, scores), 1
+                ):
+                    result = Result(
+                        archer_season=archer_season,
+                        event=event,
+                        shot_round=shot_round,
+                        placing=placing,
+                        score=score,
+                        pass_1=score // 2,
+                        pass_2=score - score // 2,
+                        golds=score // 60,
+                        hits=len(shot_round.passes) * 36,
+                    )
+                    result.fill_calculated_fields()
+                    results.append(result)
+        return Result.objects.bulk_create(results, batch_size=1000)
@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand
+
+from scayt import standings
+from scayt.models import Season
+
+
+class Command(BaseCommand):
+    help = "Recompute the materialised standings for some or all seasons."
+
+    def add_arguments(self, parser):
+        parser.add_argument("years", nargs="*", type=int)
+
+    def handle(self, *args, years, **options):
+        seasons = Season.objects.all()
+        if years:
+            seasons = seasons.filter(year__in=years)
+        for season in seasons:
+            standings.rebuild_season(season)
+            self.stdout.write("Rebuilt standings for %s" % season)
+        # Runs on every release, so this also drops pages rendered by old code.
+        seasons.bump_revision()
@@ -0,0 +1,86 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+
+from scayt import standings
+from scayt.models import Result, Season
+
+FIELDS = ["classification", "classification_2", "scayt_points"]
+
+
+def recalculate(results):
+    """Recalculate the derived fields of a chunk of results.
+
+    Runs in worker processes, so it must not touch the database.
+    """
+    calculated = []
+    for result in results:
+        calculated.append(
+            (
+                result.pk,
+                result.get_classification(),
+                result.get_classification_2() or "",
+                result.calculate_scayt_points(),
+            )
+        )
+    return calculated
+
+
+class Command(BaseCommand):
+    help = "Recalculate classifications, SCAYT points and standings for a season."
+
+    def add_arguments(self, parser):
+        parser.add_argument("years", nargs="+", type=int)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count(),
+            help="Number of worker processes, 1 to run in this process.",
+        )
+        parser.add_argument("--chunk-size", type=int, default=200)
+
+    def handle(self, *args, years, workers, chunk_size, **options):
+        seasons = list(Season.objects.filter(year__in=years))
+        missing = set(years) - {season.year for season in seasons}
+        if missing:
+            raise CommandError(
+                "Unknown season: %s" % ", ".join(map(str, sorted(missing)))
+            )
+        for season in seasons:
+            changed = self.recompute(season, workers, chunk_size)
+            standings.rebuild_season(season)
+            Season.objects.filter(pk=season.pk).bump_revision()
+            self.stdout.write("%s: %s results updated" % (season, changed))
+
+    def recompute(self, season, workers, chunk_size):
+        results = {
+            result.pk: result
+            for result in Result.objects.filter(
+                archer_season__season=season
+            ).select_related("event", "archer_season__archer", "archer_season__season")
+        }
+        chunks = [
+            list(chunk) for chunk in itertools.batched(results.values(), chunk_size)
+        ]
+        if workers > 1 and len(chunks) > 1:
+            # Forked workers must not share this process' database connection.
+            connections.close_all()
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                calculated = executor.map(recalculate, chunks)
+        else:
+            calculated = map(recalculate, chunks)
+
+        changed = []
+        for chunk in calculated:
+            for pk, *values in chunk:
+                result = results[pk]
+                if [getattr(result, field) for field in FIELDS] != values:
+                    for field, value in zip(FIELDS, values):
+                        setattr(result, field, value)
+                    changed.append(result)
+        with transaction.atomic():
+            Result.objects.bulk_update(changed, FIELDS, batch_size=chunk_size)
+        return len(changed)
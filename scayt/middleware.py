@@ -0,0 +1,109 @@
+"""Time each request, split into database, view and template time.
+
+The timings are sent in a `Server-Timing` header, so they show in the browser's
+network panel, and logged to `scayt.timing`. Views which run more queries than
+their budget in `QUERY_BUDGETS` are logged as warnings.
+"""
+
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger("scayt.timing")
+
+
+class RequestTimer:
+    """Collects the timings of one request, and counts its queries."""
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.view_start = None
+        self.render_start = None
+        self.end = None
+        self.queries = 0
+        self.db_time = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_time += time.perf_counter() - start
+            self.queries += 1
+
+    def metrics(self):
+        """Return `(name, milliseconds)` pairs, the database time overlapping
+        the view and template times."""
+        total = self.end - self.start
+        view = template = 0.0
+        if self.view_start is not None:
+            view_end = self.render_start or self.end
+            view = view_end - self.view_start
+            if self.render_start is not None:
+                template = self.end - self.render_start
+        return [
+            ("db", self.db_time * 1000),
+            ("view", view * 1000),
+            ("template", template * 1000),
+            ("total", total * 1000),
+        ]
+
+
+def get_view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return ""
+    view_class = getattr(match.func, "view_class", None)
+    return view_class.__name__ if view_class else match.func.__name__
+
+
+class ServerTimingMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        timer = request.timer = RequestTimer()
+        with connection.execute_wrapper(timer):
+            response = self.get_response(request)
+        timer.end = time.perf_counter()
+
+        metrics = timer.metrics()
+        response["Server-Timing"] = ", ".join(
+            ['queries;desc="%s"' % timer.queries]
+            + ["%s;dur=%.1f" % metric for metric in metrics]
+        )
+
+        view_name = get_view_name(request)
+        fields = {
+            "method": request.method,
+            "path": request.path,
+            "view": view_name,
+            "status": response.status_code,
+            "queries": timer.queries,
+            **{"%s_ms" % name: round(duration, 1) for name, duration in metrics},
+        }
+        logger.info(
+            " ".join("%s=%s" % (name, value) for name, value in fields.items()),
+            extra={"timing": fields},
+        )
+        budget = settings.QUERY_BUDGETS.get(view_name)
+        if budget is not None and timer.queries > budget:
+            logger.warning(
+                "%s ran %s queries for %s, over its budget of %s",
+                view_name,
+                timer.queries,
+                request.path,
+                budget,
+                extra={"timing": fields},
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request.timer.view_start = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called just before the response is rendered.
+        request.timer.render_start = time.perf_counter()
+        return response
@@ -0,0 +1,73 @@
+# Generated by Django 5.2.13 on 2026-10-18 15:41
+
+import archerydjango.fields
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scayt", "0013_result_out_of_division_season_points_system"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Standing",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "bowstyle",
+                    archerydjango.fields.BowstyleField(
+                        enum=archerydjango.fields.DbBowstyles
+                    ),
+                ),
+                (
+                    "age_group",
+                    archerydjango.fields.AgeField(
+                        blank=True, enum=archerydjango.fields.DbAges, null=True
+                    ),
+                ),
+                (
+                    "gender",
+                    archerydjango.fields.GenderField(
+                        enum=archerydjango.fields.DbGender
+                    ),
+                ),
+                ("total_points", models.FloatField(default=0)),
+                ("event_count", models.PositiveIntegerField(default=0)),
+                ("placing", models.PositiveIntegerField()),
+                ("final_placing", models.PositiveIntegerField(blank=True, null=True)),
+                (
+                    "archer_season",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to="scayt.archerseason",
+                    ),
+                ),
+                (
+                    "season",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE, to="scayt.season"
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["placing", "archer_season_id"],
+                "indexes": [
+                    models.Index(
+                        fields=["season", "bowstyle", "age_group", "gender", "placing"],
+                        name="standing_division_idx",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.13 on 2026-10-18 15:44
+
+from django.db import migrations, models
+
+
+def scayt_points(result):
+    """Equivalent of Result.calculate_scayt_points when this migration was written."""
+    points_system = result.archer_season.season.points_system
+    if points_system not in ("2023", "2026"):
+        return 2
+    if points_system == "2026" and result.out_of_division:
+        return 1
+    if result.event.is_final:
+        return {1: 6, 2: 4, 3: 3}.get(result.placing, 2)
+    if points_system == "2023":
+        return {1: 3, 2: 2, 3: 2}.get(result.placing, 2)
+    return {1: 4, 2: 3, 3: 3}.get(result.placing, 2)
+
+
+def populate_scayt_points(apps, schema_editor):
+    Result = apps.get_model("scayt", "Result")
+    results = list(Result.objects.select_related("event", "archer_season__season"))
+    for result in results:
+        result.scayt_points = scayt_points(result)
+    Result.objects.bulk_update(results, ["scayt_points"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scayt", "0014_standing"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="result",
+            name="scayt_points",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.RunPython(populate_scayt_points, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.13 on 2026-10-18 15:54
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scayt", "0015_result_scayt_points"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="season",
+            name="revision",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
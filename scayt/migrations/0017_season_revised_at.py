@@ -0,0 +1,21 @@
+# Generated by Django 5.2.13 on 2026-10-18 15:56
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scayt", "0016_season_revision"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="season",
+            name="revised_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2.13 on 2026-10-18 16:03
+
+from django.db import migrations, models
+
+
+def mark_staged(apps, schema_editor):
+    # Batches from before background imports were always fully staged.
+    ImportBatch = apps.get_model("scayt", "ImportBatch")
+    ImportBatch.objects.update(status="staged")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scayt", "0018_importbatch"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importbatch",
+            name="error",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="importbatch",
+            name="rows_parsed",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importbatch",
+            name="rows_resolved",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importbatch",
+            name="rows_saved",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="importbatch",
+            name="source",
+            field=models.TextField(blank=True),
+        ),
+        migrations.AddField(
+            model_name="importbatch",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("staging", "Reading file"),
+                    ("staged", "Awaiting confirmation"),
+                    ("saving", "Saving results"),
+                    ("done", "Imported"),
+                    ("failed", "Failed"),
+                ],
+                default="staging",
+                max_length=8,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="importbatch",
+            name="data",
+            field=models.BinaryField(default=b""),
+        ),
+        migrations.RunPython(mark_staged, migrations.RunPython.noop),
+    ]
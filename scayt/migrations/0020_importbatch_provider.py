@@ -0,0 +1,18 @@
+# Generated by Django 5.2.13 on 2026-10-18 16:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("scayt", "0019_importbatch_progress"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="importbatch",
+            name="provider",
+            field=models.CharField(blank=True, max_length=50),
+        ),
+    ]
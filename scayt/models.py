@@ -1,21 +1,35 @@
+import datetime
+import pickle
+import uuid
 from functools import cached_property
 
 from django.contrib.postgres.fields import ArrayField
 from django.core import validators
 from django.db import models
+from django.db.models import (
+    Case,
+    Count,
+    Exists,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    Q,
+    Subquery,
+    When,
+    Window,
+)
+from django.db.models.functions import Cast, Coalesce, Now, Rank, RowNumber
 from django.utils import timezone
 
 import archeryutils
-from archeryutils.classifications import (
-    AGB_bowstyles,
-    calculate_agb_outdoor_classification,
-)
+from archerydjango.classifications import calculate_outdoor_classification
 from archerydjango.fields import (
     AgeField,
     BowstyleField,
     GenderField,
     RoundField,
 )
+from archerydjango.rounds import RoundRegistry
 from archerydjango.utils import get_age_group
 
 from . import custom_rounds
@@ -48,6 +62,12 @@ POINTS_SYSTEMS = [
 ]
 
 
+class SeasonQuerySet(models.QuerySet):
+    def bump_revision(self):
+        """Mark every page of these seasons as changed."""
+        return self.update(revision=F("revision") + 1, revised_at=Now())
+
+
 class Season(models.Model):
     year = models.PositiveIntegerField(
         validators=[
@@ -56,6 +76,10 @@ class Season(models.Model):
         ]
     )
     points_system = models.CharField(max_length=4, choices=POINTS_SYSTEMS)
+    revision = models.PositiveIntegerField(default=0, editable=False)
+    revised_at = models.DateTimeField(default=timezone.now, editable=False)
+
+    objects = SeasonQuerySet.as_manager()
 
     def __str__(self):
         return "%s season" % self.year
@@ -84,6 +108,22 @@ def default_age_groups():
     return ["U21", "U18", "U16", "U15", "U14", "U12"]
 
 
+class EventQuerySet(models.QuerySet):
+    def with_result_counts(self):
+        """Annotate `has_results`, `result_count` and `division_count`."""
+        results = Result.objects.filter(event=OuterRef("pk")).order_by()
+        divisions = results.values(
+            "archer_season__bowstyle",
+            "age_group_competed",
+            "archer_season__archer__gender",
+        ).distinct()
+        return self.annotate(
+            has_results=Exists(results),
+            result_count=SubqueryCount(results.values("pk")),
+            division_count=SubqueryCount(divisions),
+        )
+
+
 class Event(models.Model):
     season = models.ForeignKey(Season, on_delete=models.PROTECT)
     is_final = models.BooleanField(blank=True, default=False)
@@ -103,7 +143,11 @@ class Event(models.Model):
     entry_link = models.URLField(blank=True, null=True)
     full_results = models.URLField(blank=True, null=True)
 
+    objects = EventQuerySet.as_manager()
+
+    @cached_property
     def has_results(self):
+        """Replaced by the annotation from `with_result_counts` when used."""
         return self.result_set.exists()
 
     def __str__(self):
@@ -132,6 +176,100 @@ class Archer(models.Model):
         return self.name
 
 
+def weight_results(results, final_result=None):
+    """Add `weighted_scayt_points` to the results, and the final if there is one.
+
+    The best three results count in full, and the nth best after that is worth
+    1/n of its points. The final always counts in full.
+    """
+    by_best = sorted(results, key=lambda r: r.scayt_points, reverse=True)
+    for result in by_best[:3]:
+        result.weighted_scayt_points = result.scayt_points
+    for shoot_count, result in enumerate(by_best[3:], 4):
+        result.weighted_scayt_points = float(result.scayt_points) / shoot_count
+    if final_result:
+        final_result.weighted_scayt_points = final_result.scayt_points
+        results = list(results) + [final_result]
+    return results
+
+
+class SubquerySum(models.Subquery):
+    """Sum the single column returned by a subquery."""
+
+    template = "(SELECT SUM(value) FROM (%(subquery)s) AS subquery_rows(value))"
+
+
+class SubqueryCount(models.Subquery):
+    """Count the rows returned by a subquery."""
+
+    template = "(SELECT COUNT(*) FROM (%(subquery)s) AS subquery_rows)"
+    output_field = models.IntegerField()
+
+
+class ArcherSeasonQuerySet(models.QuerySet):
+    def with_scayt_totals(self, season):
+        """Annotate `scayt_total`, `event_count` and placings within the division.
+
+        This is the SQL version of `weight_results`. Archers who do not qualify
+        for the final standings have a `final_placing` of None.
+        """
+        points = Cast(
+            "scayt_points", models.DecimalField(max_digits=20, decimal_places=10)
+        )
+        weighted = (
+            Result.objects.filter(archer_season=OuterRef("pk"), event__is_final=False)
+            .annotate(
+                shoot_count=Window(RowNumber(), order_by=F("scayt_points").desc())
+            )
+            .values(
+                weighted=Case(
+                    When(shoot_count__lte=3, then=points),
+                    default=points / F("shoot_count"),
+                )
+            )
+        )
+        final = (
+            Result.objects.filter(archer_season=OuterRef("pk"), event__is_final=True)
+            .order_by("pk")
+            .values("scayt_points")[:1]
+        )
+        division = [F("bowstyle"), F("age_group"), F("archer__gender")]
+        qualified = Q(event_count__gte=3, archer__is_scas_member=True)
+        return (
+            self.filter(season=season)
+            .annotate(
+                scayt_total=Cast(
+                    Coalesce(SubquerySum(weighted), 0) + Coalesce(Subquery(final), 0),
+                    models.FloatField(),
+                ),
+                event_count=Count("result"),
+                qualified=ExpressionWrapper(qualified, models.BooleanField()),
+            )
+            .annotate(
+                placing=Window(
+                    Rank(), partition_by=division, order_by=F("scayt_total").desc()
+                ),
+                qualified_placing=Window(
+                    Rank(),
+                    partition_by=division + [F("qualified")],
+                    order_by=F("scayt_total").desc(),
+                ),
+                final_placing=Case(When(qualified=True, then=F("qualified_placing"))),
+            )
+        )
+
+    def with_results(self):
+        """Prefetch results and their events for `annotated_results`."""
+        return self.select_related("season").prefetch_related(
+            models.Prefetch(
+                "result_set",
+                queryset=Result.objects.select_related("event").order_by(
+                    "event__date", "pk"
+                ),
+            )
+        )
+
+
 class ArcherSeason(models.Model):
     archer = models.ForeignKey(Archer, on_delete=models.PROTECT)
     season = models.ForeignKey(Season, on_delete=models.PROTECT)
@@ -139,6 +277,8 @@ class ArcherSeason(models.Model):
     bowstyle = BowstyleField()
     age_group = AgeField(blank=True, null=True)
 
+    objects = ArcherSeasonQuerySet.as_manager()
+
     def __str__(self):
         return "%s in %s shooting %s" % (
             self.archer,
@@ -147,41 +287,63 @@ class ArcherSeason(models.Model):
         )
 
     def save(self, *args, **kwargs):
+        self.fill_calculated_fields()
+        super().save(*args, **kwargs)
+
+    def fill_calculated_fields(self):
+        """Set fields derived from the archer, also used before bulk_create."""
         if not self.age_group:
             self.age_group = get_age_group(
                 self.archer.year,
                 self.season.year,
             )
-        super().save(*args, **kwargs)
 
     @cached_property
     def annotated_results(self):
-        """Load the results, and then add `weighted_scayt_points`."""
-        results = self.result_set.order_by("event__date").exclude(event__is_final=True)
-        by_best = sorted(results, key=lambda r: r.scayt_points, reverse=True)
-        for result in by_best[:3]:
-            result.weighted_scayt_points = result.scayt_points
-        for shoot_count, result in enumerate(by_best[3:], 4):
-            result.weighted_scayt_points = float(result.scayt_points) / shoot_count
-        final_result = self.result_set.filter(event__is_final=True).first()
-        if final_result:
-            final_result.weighted_scayt_points = final_result.scayt_points
-            results = list(results) + [final_result]
-        return results
+        """Load the results, and then add `weighted_scayt_points`.
+
+        Results prefetched by `ArcherSeasonQuerySet.with_results` are used
+        without any further queries.
+        """
+        if "result_set" in getattr(self, "_prefetched_objects_cache", {}):
+            results = self.result_set.all()
+        else:
+            results = self.result_set.select_related("event").order_by(
+                "event__date", "pk"
+            )
+        finals = [r for r in results if r.event.is_final]
+        return weight_results(
+            [r for r in results if not r.event.is_final],
+            min(finals, key=lambda r: r.pk) if finals else None,
+        )
 
     @property
     def total_scayt_points(self):
         return sum(map(lambda r: r.weighted_scayt_points, self.annotated_results))
 
 
-rounds = (
-    archeryutils.load_rounds.WA_outdoor
-    | archeryutils.load_rounds.AGB_outdoor_metric
-    | archeryutils.load_rounds.AGB_outdoor_imperial
-    | custom_rounds.rounds
+rounds = RoundRegistry(
+    archeryutils.load_rounds.WA_outdoor,
+    archeryutils.load_rounds.AGB_outdoor_metric,
+    archeryutils.load_rounds.AGB_outdoor_imperial,
+    custom_rounds.rounds,
 )
 
 
+class ResultQuerySet(models.QuerySet):
+    def update_scayt_points(self, batch_size=500):
+        """Recalculate the stored `scayt_points`, returning how many changed."""
+        changed = []
+        results = self.select_related("event", "archer_season__season")
+        for result in results.iterator(chunk_size=batch_size):
+            points = result.calculate_scayt_points()
+            if points != result.scayt_points:
+                result.scayt_points = points
+                changed.append(result)
+        self.model.objects.bulk_update(changed, ["scayt_points"], batch_size=batch_size)
+        return len(changed)
+
+
 class Result(models.Model):
     archer_season = models.ForeignKey(ArcherSeason, on_delete=models.PROTECT)
     event = models.ForeignKey(Event, on_delete=models.PROTECT)
@@ -216,6 +378,9 @@ class Result(models.Model):
     out_of_division = models.BooleanField(default=False)
     classification = models.CharField(max_length=3, blank=True, default="")
     classification_2 = models.CharField(max_length=3, blank=True, default="")
+    scayt_points = models.PositiveSmallIntegerField(default=0, editable=False)
+
+    objects = ResultQuerySet.as_manager()
 
     def __str__(self):
         return "{archer} at {event} - Placing {place}".format(
@@ -225,13 +390,18 @@ class Result(models.Model):
         )
 
     def save(self, *args, **kwargs):
+        self.fill_calculated_fields()
+        super().save(*args, **kwargs)
+
+    def fill_calculated_fields(self):
+        """Set classifications and points, also used before bulk_create."""
         if not self.age_group_competed:
             self.age_group_competed = self.archer_season.age_group
         if not self.classification:
             self.classification = self.get_classification()
             if self.shot_round_2:
                 self.classification_2 = self.get_classification_2()
-        super().save(*args, **kwargs)
+        self.scayt_points = self.calculate_scayt_points()
 
     @property
     def division(self):
@@ -261,8 +431,7 @@ class Result(models.Model):
             return len(self.shot_round.passes) + len(self.shot_round_2.passes)
         return len(self.shot_round.passes)
 
-    @property
-    def scayt_points(self):
+    def calculate_scayt_points(self):
         if self.archer_season.season.points_system == "2023":
             if self.event.is_final:
                 if self.placing == 1:
@@ -300,10 +469,10 @@ class Result(models.Model):
                 raise "Unknown double round format"
             score = self.pass_1 + (self.pass_2 or 0)
         try:
-            return calculate_agb_outdoor_classification(
+            return calculate_outdoor_classification(
                 score,
                 self.shot_round,
-                AGB_bowstyles(self.archer_season.bowstyle.value),
+                self.archer_season.bowstyle,
                 self.archer_season.archer.gender,
                 self.archer_season.age_group,
             )
@@ -316,12 +485,105 @@ class Result(models.Model):
         if not len(self.shot_round.passes) == 2:
             raise "Unknown double round format"
         try:
-            return calculate_agb_outdoor_classification(
+            return calculate_outdoor_classification(
                 self.pass_3 + (self.pass_4 or 0),
                 self.shot_round,
-                AGB_bowstyles(self.archer_season.bowstyle.value),
+                self.archer_season.bowstyle,
                 self.archer_season.archer.gender,
                 self.archer_season.age_group,
             )
         except ValueError:
             return "N/A"
+
+
+class Standing(models.Model):
+    """Materialised SCAYT total and placing for an ArcherSeason.
+
+    Kept up to date by `scayt.standings` whenever results change.
+    """
+
+    archer_season = models.OneToOneField(ArcherSeason, on_delete=models.CASCADE)
+    season = models.ForeignKey(Season, on_delete=models.CASCADE)
+    bowstyle = BowstyleField()
+    age_group = AgeField(blank=True, null=True)
+    gender = GenderField()
+    total_points = models.FloatField(default=0)
+    event_count = models.PositiveIntegerField(default=0)
+    placing = models.PositiveIntegerField()
+    final_placing = models.PositiveIntegerField(blank=True, null=True)
+
+    class Meta:
+        ordering = ["placing", "archer_season_id"]
+        indexes = [
+            models.Index(
+                fields=["season", "bowstyle", "age_group", "gender", "placing"],
+                name="standing_division_idx",
+            ),
+        ]
+
+    def __str__(self):
+        return "%s - %s" % (self.archer_season, self.placing)
+
+    @property
+    def division(self):
+        return "%s %s %s" % (self.bowstyle, self.age_group, self.gender)
+
+
+IMPORT_STATUSES = [
+    ("staging", "Reading file"),
+    ("staged", "Awaiting confirmation"),
+    ("saving", "Saving results"),
+    ("done", "Imported"),
+    ("failed", "Failed"),
+]
+
+
+class ImportBatchQuerySet(models.QuerySet):
+    def expired(self):
+        return self.filter(created__lt=timezone.now() - datetime.timedelta(days=1))
+
+
+class ImportBatch(models.Model):
+    """A results file being imported in the background.
+
+    The resolved rows from `ResultImporter.translate` are pickled, so the
+    unsaved archers, seasons and results shared between rows survive intact
+    until the import is confirmed.
+    """
+
+    token = models.UUIDField(default=uuid.uuid4, unique=True, editable=False)
+    event = models.ForeignKey(Event, on_delete=models.CASCADE)
+    created = models.DateTimeField(auto_now_add=True)
+    status = models.CharField(max_length=8, choices=IMPORT_STATUSES, default="staging")
+    provider = models.CharField(max_length=50, blank=True)
+    error = models.TextField(blank=True)
+    source = models.TextField(blank=True)
+    data = models.BinaryField(editable=False, default=b"")
+    rows_parsed = models.PositiveIntegerField(default=0)
+    rows_resolved = models.PositiveIntegerField(default=0)
+    rows_saved = models.PositiveIntegerField(default=0)
+
+    objects = ImportBatchQuerySet.as_manager()
+
+    def __str__(self):
+        return "Import for %s" % self.event
+
+    @property
+    def is_running(self):
+        return self.status in ("staging", "saving")
+
+    def progress(self):
+        return {
+            "status": self.status,
+            "rows_parsed": self.rows_parsed,
+            "rows_resolved": self.rows_resolved,
+            "rows_saved": self.rows_saved,
+        }
+
+    @cached_property
+    def rows(self):
+        return pickle.loads(self.data)
+
+    def set_rows(self, rows):
+        self.data = pickle.dumps(rows)
+        self.__dict__["rows"] = rows
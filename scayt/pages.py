@@ -0,0 +1,113 @@
+"""The public pages belonging to a season."""
+
+import functools
+
+from django.urls import get_script_prefix, reverse
+
+from archerydjango.fields import DbAges, DbBowstyles, DbGender
+
+DIVISION_AGES = [
+    age.name.removeprefix("AGE_UNDER_")
+    for age in DbAges
+    if age.name.startswith("AGE_UNDER_")
+]
+
+BOWSTYLES = {"R": "Recurve", "C": "Compound", "B": "Barebow", "L": "Longbow"}
+GENDERS = {"W": "Women", "M": "Men"}
+BOWSTYLE_CODES = {DbBowstyles.__lookup__[code]: code for code in BOWSTYLES}
+GENDER_CODES = {DbGender.__lookup__[code]: code for code in GENDERS}
+
+
+def division_kwargs():
+    """URL kwargs for every division standings page, without the year."""
+    return [
+        {"bow": bow, "age": age, "gender": gender}
+        for bow in BOWSTYLES
+        for age in DIVISION_AGES
+        for gender in "MW"
+    ]
+
+
+def division_slug(bowstyle, age_group, gender):
+    """Name a division as in its URL, such as "RU16W", or None for ages
+    outside the league's divisions."""
+    if age_group is None or not age_group.name.startswith("AGE_UNDER_"):
+        return None
+    return "%sU%s%s" % (
+        BOWSTYLE_CODES[bowstyle],
+        age_group.name.removeprefix("AGE_UNDER_"),
+        GENDER_CODES[gender],
+    )
+
+
+@functools.lru_cache(maxsize=1024)
+def _reverse(script_prefix, name, kwargs):
+    # The script prefix is only part of the key, reverse() reads it itself.
+    return reverse(name, kwargs=dict(kwargs))
+
+
+def _season_reverse(name, year, is_current, **kwargs):
+    if not is_current:
+        kwargs["year"] = year
+    return _reverse(get_script_prefix(), name, tuple(sorted(kwargs.items())))
+
+
+def season_reverse(name, season, **kwargs):
+    """Reverse a page of `season`, adding its year unless it is current.
+
+    The same few URLs are on every page, so they are remembered.
+    """
+    return _season_reverse(name, season.year, season.is_current, **kwargs)
+
+
+@functools.lru_cache(maxsize=64)
+def _division_links(script_prefix, year, is_current):
+    return [
+        {
+            "name": bow_name,
+            "genders": [
+                {
+                    "code": gender,
+                    "links": [
+                        {
+                            "label": "U%s %s" % (age, gender_name),
+                            "url": _season_reverse(
+                                "division-standings",
+                                year,
+                                is_current,
+                                bow=bow,
+                                age=age,
+                                gender=gender,
+                            ),
+                        }
+                        for age in DIVISION_AGES
+                    ],
+                }
+                for gender, gender_name in GENDERS.items()
+            ],
+        }
+        for bow, bow_name in BOWSTYLES.items()
+    ]
+
+
+def division_links(season):
+    """The links to each division's standings, grouped by bowstyle then
+    gender as on the standings page. Built once per season."""
+    return _division_links(get_script_prefix(), season.year, season.is_current)
+
+
+def season_paths(season):
+    """Return the path of every page showing `season`, with its year."""
+    year = season.year
+    paths = [
+        reverse("calendar", kwargs={"year": year}),
+        reverse("standings", kwargs={"year": year}),
+        reverse("final-standings", kwargs={"year": year}),
+    ]
+    for kwargs in division_kwargs():
+        paths.append(reverse("division-standings", kwargs={"year": year, **kwargs}))
+    for pk in season.event_set.order_by("pk").values_list("pk", flat=True):
+        paths.append(reverse("event-results", kwargs={"pk": pk}))
+    for pk in season.archerseason_set.order_by("pk").values_list("pk", flat=True):
+        paths.append(reverse("individual-standings", kwargs={"pk": pk}))
+    return paths
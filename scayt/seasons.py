@@ -0,0 +1,36 @@
+"""Look up seasons at most once per request.
+
+Seasons are few, so every season is loaded together and the current season,
+previous seasons and seasons by year all come from that one query.
+"""
+
+from functools import cached_property
+
+from .models import Season
+
+
+class Seasons:
+    @cached_property
+    def all(self):
+        return list(Season.objects.all())
+
+    def current(self):
+        return self.all[0] if self.all else None
+
+    def previous(self):
+        return self.all[1:]
+
+    def get(self, year):
+        for season in self.all:
+            if season.year == year:
+                return season
+        raise Season.DoesNotExist("No season for %s" % year)
+
+
+def get_seasons(request):
+    """Return the `Seasons` for this request, creating it on first use."""
+    try:
+        return request.seasons
+    except AttributeError:
+        request.seasons = Seasons()
+        return request.seasons
@@ -30,6 +30,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     "whitenoise.middleware.WhiteNoiseMiddleware",
+    "scayt.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -52,6 +53,7 @@ TEMPLATES = [
                 "django.template.context_processors.request",
                 "django.contrib.auth.context_processors.auth",
                 "django.contrib.messages.context_processors.messages",
+                "scayt.context_processors.seasons",
             ],
         },
     },
@@ -65,6 +67,52 @@ DATABASES = {"default": dj_database_url.config(default="postgres://localhost/sca
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
+# Caching
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "OPTIONS": {"MAX_ENTRIES": 1000},
+    }
+}
+if os.environ.get("REDIS_URL"):
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.environ["REDIS_URL"],
+    }
+# Pages of the current season can depend on today's date, so they expire.
+PAGE_CACHE_TIMEOUT = 60 * 10
+
+
+# Request timing
+# Views are logged as warnings when they run more queries than this.
+QUERY_BUDGETS = {
+    "Root": 5,
+    "Calendar": 5,
+    "Standings": 5,
+    "FinalStandings": 10,
+    "DivisionStandings": 10,
+    "EventResults": 10,
+    "IndividualStandings": 10,
+    "StandingsData": 5,
+}
+
+
+# Logging
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "handlers": {
+        "console": {"class": "logging.StreamHandler"},
+    },
+    "loggers": {
+        "scayt": {
+            "handlers": ["console"],
+            "level": os.environ.get("LOG_LEVEL", "INFO"),
+        },
+    },
+}
+
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -96,3 +144,12 @@ STATICFILES_DIRS = [
 ]
 STATIC_ROOT = os.path.join(BASE_DIR, "collected_static")
 STATICFILES_STORAGE = "whitenoise.storage.CompressedStaticFilesStorage"
+
+# Extra round names for the CSV importer, as {provider: {name: codename}}.
+ROUND_ALIASES = {}
+
+# Finished seasons rendered by `export_season`, served ahead of the views.
+ARCHIVE_ROOT = BASE_DIR / "archive"
+if ARCHIVE_ROOT.exists():
+    WHITENOISE_ROOT = ARCHIVE_ROOT
+WHITENOISE_INDEX_FILE = True
@@ -0,0 +1,103 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import standings
+from .models import Archer, ArcherSeason, Event, Result, Season, Venue
+
+
+@receiver(pre_save, sender=Result)
+def remember_previous_archer_season(sender, instance, **kwargs):
+    """Note the archer season a result is being moved away from, if any."""
+    instance._previous_archer_season = None
+    if not instance._state.adding:
+        instance._previous_archer_season = (
+            ArcherSeason.objects.filter(result=instance)
+            .exclude(pk=instance.archer_season_id)
+            .select_related("archer")
+            .first()
+        )
+
+
+def result_archer_seasons(result):
+    """The archer seasons whose standings a change to `result` affects."""
+    archer_seasons = [result.archer_season]
+    previous = getattr(result, "_previous_archer_season", None)
+    if previous is not None:
+        archer_seasons.append(previous)
+    return archer_seasons
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def update_result_standings(sender, instance, **kwargs):
+    standings.update_divisions(
+        {standings.division_key(s) for s in result_archer_seasons(instance)}
+    )
+
+
+@receiver(post_save, sender=ArcherSeason)
+def update_archer_season_standings(sender, instance, **kwargs):
+    standings.update_archer_seasons([instance])
+
+
+@receiver(post_delete, sender=ArcherSeason)
+def remove_archer_season_standings(sender, instance, **kwargs):
+    standings.update_division(*standings.division_key(instance))
+
+
+@receiver(post_save, sender=Archer)
+def update_archer_standings(sender, instance, created, **kwargs):
+    if not created:
+        standings.update_archer_seasons(
+            instance.archerseason_set.select_related("archer")
+        )
+
+
+@receiver(post_save, sender=Event)
+def update_event_standings(sender, instance, created, **kwargs):
+    if not created:
+        instance.result_set.update_scayt_points()
+        standings.rebuild_season(instance.season)
+
+
+@receiver(post_save, sender=Season)
+def update_season_standings(sender, instance, created, **kwargs):
+    if not created:
+        Result.objects.filter(archer_season__season=instance).update_scayt_points()
+        standings.rebuild_season(instance)
+
+
+@receiver(post_save, sender=Result)
+@receiver(post_delete, sender=Result)
+def bump_result_revision(sender, instance, **kwargs):
+    Season.objects.filter(
+        pk__in={s.season_id for s in result_archer_seasons(instance)}
+    ).bump_revision()
+
+
+@receiver(post_save, sender=ArcherSeason)
+@receiver(post_delete, sender=ArcherSeason)
+@receiver(post_save, sender=Event)
+@receiver(post_delete, sender=Event)
+def bump_season_revision(sender, instance, **kwargs):
+    Season.objects.filter(pk=instance.season_id).bump_revision()
+
+
+@receiver(post_save, sender=Archer)
+def bump_archer_revision(sender, instance, created, **kwargs):
+    if not created:
+        Season.objects.filter(archerseason__archer=instance).bump_revision()
+
+
+@receiver(post_save, sender=Venue)
+@receiver(post_delete, sender=Venue)
+def bump_venue_revision(sender, instance, **kwargs):
+    Season.objects.filter(event__venue=instance).bump_revision()
+
+
+@receiver(post_save, sender=Season)
+@receiver(post_delete, sender=Season)
+def bump_all_revisions(sender, instance, **kwargs):
+    # Every page links to the current season, so any season change can
+    # affect all of them.
+    Season.objects.bump_revision()
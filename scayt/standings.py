@@ -0,0 +1,132 @@
+"""Maintain the materialised `Standing` rows.
+
+A division is always recomputed as a whole, as a single result can move
+every placing within it. Its rows are replaced each time, so the highest
+primary key in a division doubles as that division's revision.
+
+Recomputes lock the season's row first, so that overlapping ones, such as a
+background import and an admin edit, run one after the other and the later
+one always reads the other's results.
+"""
+
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Max, Q
+
+from .models import ArcherSeason, Season, Standing
+
+
+def division_key(archer_season):
+    return (
+        archer_season.season_id,
+        archer_season.bowstyle,
+        archer_season.age_group,
+        archer_season.archer.gender,
+    )
+
+
+def compute_standings(season, *args, **filters):
+    """Build unsaved Standing rows for the season, grouped by division.
+
+    Totals and placings are calculated by the database in a single query.
+    """
+    archer_seasons = (
+        ArcherSeason.objects.with_scayt_totals(season)
+        .filter(*args, **filters)
+        .select_related("archer")
+        .order_by("pk")
+    )
+    divisions = defaultdict(list)
+    for archer_season in archer_seasons:
+        divisions[division_key(archer_season)].append(
+            Standing(
+                archer_season=archer_season,
+                season_id=archer_season.season_id,
+                bowstyle=archer_season.bowstyle,
+                age_group=archer_season.age_group,
+                gender=archer_season.archer.gender,
+                total_points=archer_season.scayt_total,
+                event_count=archer_season.event_count,
+                placing=archer_season.placing,
+                final_placing=archer_season.final_placing,
+            )
+        )
+    return divisions
+
+
+def division_revisions(standings):
+    """Return `(division key, revision)` pairs for the divisions in `standings`.
+
+    The revision changes whenever the division is recomputed, and no other
+    division's does.
+    """
+    return [
+        (
+            (row["season_id"], row["bowstyle"], row["age_group"], row["gender"]),
+            row["revision"],
+        )
+        for row in standings.order_by()
+        .values("season_id", "bowstyle", "age_group", "gender")
+        .annotate(revision=Max("pk"))
+        .order_by("season_id", "bowstyle", "age_group", "gender")
+    ]
+
+
+def lock_season(season_id):
+    """Lock a season's row until the end of the current transaction."""
+    list(Season.objects.select_for_update().filter(pk=season_id).values("pk"))
+
+
+def update_division(season_id, bowstyle, age_group, gender):
+    update_divisions([(season_id, bowstyle, age_group, gender)])
+
+
+def update_divisions(keys):
+    """Recompute the given divisions, using a few queries per season."""
+    by_season = defaultdict(list)
+    for season_id, bowstyle, age_group, gender in keys:
+        by_season[season_id].append((bowstyle, age_group, gender))
+    # Seasons are locked in order, so two updates can't deadlock.
+    for season_id, divisions in sorted(by_season.items()):
+        archer_seasons = Q()
+        existing = Q()
+        for bowstyle, age_group, gender in divisions:
+            archer_seasons |= Q(
+                bowstyle=bowstyle, age_group=age_group, archer__gender=gender
+            )
+            existing |= Q(bowstyle=bowstyle, age_group=age_group, gender=gender)
+        with transaction.atomic():
+            lock_season(season_id)
+            standings = [
+                standing
+                for division in compute_standings(season_id, archer_seasons).values()
+                for standing in division
+            ]
+            Standing.objects.filter(
+                Q(existing, season_id=season_id)
+                | Q(archer_season__in=[s.archer_season_id for s in standings])
+            ).delete()
+            Standing.objects.bulk_create(standings)
+
+
+def update_archer_seasons(archer_seasons):
+    """Recompute the current and previous divisions of `archer_seasons`."""
+    archer_seasons = list(archer_seasons)
+    keys = {division_key(archer_season) for archer_season in archer_seasons}
+    keys.update(
+        Standing.objects.filter(archer_season__in=archer_seasons).values_list(
+            "season_id", "bowstyle", "age_group", "gender"
+        )
+    )
+    update_divisions(keys)
+
+
+def rebuild_season(season):
+    with transaction.atomic():
+        lock_season(season.pk)
+        divisions = compute_standings(season)
+        Standing.objects.filter(season=season).delete()
+        Standing.objects.bulk_create(
+            [s for division in divisions.values() for s in division]
+        )
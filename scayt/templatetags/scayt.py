@@ -1,7 +1,8 @@
 from django import template
-from django.urls import reverse
 from django.utils.safestring import mark_safe
 
+from scayt.pages import season_reverse
+
 register = template.Library()
 
 
@@ -33,7 +34,4 @@ def tag(classification):
 
 @register.simple_tag
 def season_url(name, season, **kwargs):
-    if season.is_current:
-        return reverse(name, kwargs=kwargs)
-    kwargs["year"] = season.year
-    return reverse(name, kwargs=kwargs)
+    return season_reverse(name, season, **kwargs)
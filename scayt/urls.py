@@ -36,6 +36,49 @@ urlpatterns = [
         views.IndividualStandings.as_view(),
         name="individual-standings",
     ),
+    path("standings/data/", views.StandingsData.as_view(), name="standings-data"),
+    path(
+        "<int:year>/standings/data/",
+        views.StandingsData.as_view(),
+        name="standings-data",
+    ),
+    re_path(
+        r"^standings\.(?P<format>csv|json)$",
+        views.StandingsExport.as_view(),
+        name="standings-export",
+    ),
+    re_path(
+        r"^(?P<year>\d{4})/standings\.(?P<format>csv|json)$",
+        views.StandingsExport.as_view(),
+        name="standings-export",
+    ),
+    re_path(
+        r"^standings/(?P<bow>[RCBL])U(?P<age>\d+)(?P<gender>[MW])"
+        r"\.(?P<format>csv|json)$",
+        views.StandingsExport.as_view(),
+        name="division-standings-export",
+    ),
+    re_path(
+        r"^(?P<year>\d{4})/standings/(?P<bow>[RCBL])U(?P<age>\d+)(?P<gender>[MW])"
+        r"\.(?P<format>csv|json)$",
+        views.StandingsExport.as_view(),
+        name="division-standings-export",
+    ),
+    re_path(
+        r"^results\.(?P<format>csv|json)$",
+        views.ResultsExport.as_view(),
+        name="results-export",
+    ),
+    re_path(
+        r"^(?P<year>\d{4})/results\.(?P<format>csv|json)$",
+        views.ResultsExport.as_view(),
+        name="results-export",
+    ),
+    re_path(
+        r"^results/(?P<pk>\d+)\.(?P<format>csv|json)$",
+        views.ResultsExport.as_view(),
+        name="event-results-export",
+    ),
     path("faq/", views.FAQs.as_view(), name="faqs"),
     path("admin/", admin.site.urls),
 ]
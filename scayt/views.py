@@ -1,46 +1,108 @@
+import hashlib
 import itertools
 
-from django.db.models import Count
-from django.views.generic import DetailView, ListView, RedirectView, TemplateView
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+from django.template.loader import render_to_string
+from django.http import Http404, JsonResponse
+from django.shortcuts import get_object_or_404
+from django.utils.text import slugify
+from django.views.generic import DetailView, ListView, RedirectView, TemplateView, View
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
 
 from archerydjango.fields import DbAges, DbBowstyles, DbGender
 
-from .models import ArcherSeason, Event, Season
+from . import exports
+from .models import ArcherSeason, Event, Result, Season, Standing
+from .pages import division_links, division_slug
+from .seasons import get_seasons
+from .standings import division_revisions
 
 
 class Root(TemplateView):
     template_name = "scayt/root.html"
 
     def get_context_data(self, **kwargs):
-        season = Season.objects.first()
+        season = get_seasons(self.request).current()
         upcoming_events = season.event_set.order_by("date", "name").filter(
             date__gte=timezone.now().date()
         )[:3]
-        previous_seasons = Season.objects.exclude(pk=season.pk).order_by("-year")
         return super().get_context_data(
-            current_season=season,
-            season=season,
-            page_name="root",
-            upcoming_events=upcoming_events,
-            previous_seasons=previous_seasons,
-            **kwargs
+            season=season, page_name="root", upcoming_events=upcoming_events, **kwargs
         )
 
 
 class SeasonMixin:
     def get_season(self):
+        seasons = get_seasons(self.request)
         if "year" in self.kwargs:
-            season = Season.objects.get(year=self.kwargs["year"])
-        else:
-            season = Season.objects.first()
+            return seasons.get(int(self.kwargs["year"]))
+        return seasons.current()
+
+    def get_season_or_404(self):
+        try:
+            season = self.get_season()
+        except Season.DoesNotExist as e:
+            raise Http404(str(e))
+        if season is None:
+            raise Http404("There are no seasons yet")
         return season
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["current_season"] = Season.objects.first()
-        return context
+
+class CachedPageMixin:
+    """Cache rendered pages against the revision of the season they show.
+
+    Changing any of a season's data bumps `Season.revision`, so outdated pages
+    are simply never looked up again. Past seasons are cached indefinitely.
+    The revision also provides the ETag and Last-Modified headers, so clients
+    revalidating an unchanged page get a 304 after a single query.
+    """
+
+    def get_cache_season(self):
+        return self.get_season()
+
+    def get_cache_key(self, season):
+        return "scayt:page:%s:%s:%s:%s:%s" % (
+            type(self).__name__,
+            season.year,
+            season.revision,
+            season.is_current,
+            hashlib.md5(self.request.get_full_path().encode()).hexdigest(),
+        )
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.method not in ("GET", "HEAD") or getattr(request, "archived", False):
+            return super().dispatch(request, *args, **kwargs)
+        season = self.get_cache_season()
+        if season is None:
+            return super().dispatch(request, *args, **kwargs)
+        key = self.get_cache_key(season)
+        etag = quote_etag(hashlib.md5(key.encode()).hexdigest())
+        last_modified = int(season.revised_at.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = cache.get(key)
+        if response is None:
+            response = super().dispatch(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+            timeout = settings.PAGE_CACHE_TIMEOUT if season.is_current else None
+            if hasattr(response, "add_post_render_callback"):
+                response.add_post_render_callback(
+                    lambda response: cache.set(key, response, timeout)
+                )
+            else:
+                cache.set(key, response, timeout)
+        response.headers["ETag"] = etag
+        response.headers["Last-Modified"] = http_date(last_modified)
+        patch_cache_control(response, no_cache=True)
+        return response
 
 
 class YearRedirect(RedirectView):
@@ -48,13 +110,17 @@ class YearRedirect(RedirectView):
         return reverse("calendar", kwargs=self.kwargs)
 
 
-class Calendar(SeasonMixin, ListView):
+class Calendar(CachedPageMixin, SeasonMixin, ListView):
     template_name = "scayt/calendar.html"
     context_object_name = "events"
 
     def get_queryset(self):
         self.season = self.get_season()
-        return self.season.event_set.order_by("date", "name").select_related("venue")
+        return (
+            self.season.event_set.order_by("date", "name")
+            .select_related("venue")
+            .with_result_counts()
+        )
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
@@ -74,93 +140,127 @@ class FAQs(Root):
         return context
 
 
-class EventResults(DetailView):
-    model = Event
+class EventResults(CachedPageMixin, DetailView):
+    queryset = Event.objects.select_related("season")
     template_name = "scayt/event_results.html"
 
+    def get_cache_season(self):
+        return Season.objects.filter(event=self.kwargs["pk"]).first()
+
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["results"] = self.object.result_set.order_by(
-            "archer_season__bowstyle",
-            "age_group_competed",
-            "archer_season__archer__gender",
-            "placing",
-        ).select_related("archer_season", "archer_season__archer")
+        results = list(
+            self.object.result_set.order_by(
+                "archer_season__bowstyle",
+                "age_group_competed",
+                "archer_season__archer__gender",
+                "placing",
+            ).select_related("archer_season__archer")
+        )
+        # Results are shown in groups, headed by their division and round.
+        context["groups"] = []
+        for _, group in itertools.groupby(
+            results,
+            key=lambda r: (
+                r.age_group_competed,
+                r.archer_season.bowstyle,
+                r.archer_season.archer.gender,
+            ),
+        ):
+            group = list(group)
+            context["groups"].append(
+                {
+                    "division": group[0].division,
+                    "round_name": group[0].round_name,
+                    "results": group,
+                }
+            )
+        if results:
+            context["n_passes"] = results[0].n_passes
+            context["scoring_system"] = results[0].shot_round.passes[0].scoring_system
         return context
 
 
-class Standings(SeasonMixin, Root):
+class Standings(CachedPageMixin, SeasonMixin, Root):
     template_name = "scayt/standings.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["season"] = self.get_season()
+        context["season"] = season = self.get_season()
+        context["divisions"] = division_links(season)
         return context
 
 
-class FinalStandings(SeasonMixin, TemplateView):
+class FinalStandings(CachedPageMixin, SeasonMixin, TemplateView):
+    """Each division's table is cached separately, against the division's
+    revision, so a change to one division only re-renders that table."""
+
     template_name = "scayt/final_standings.html"
+    division_template_name = "scayt/final_standings_division.html"
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         season = self.get_season()
         context["season"] = season
 
-        categories = itertools.product(
-            DbBowstyles,
-            (a for a in DbAges if str(a).startswith("U")),
-            DbGender,
+        standings = Standing.objects.filter(
+            season=season,
+            age_group__in=[a for a in DbAges if str(a).startswith("U")],
+            final_placing__isnull=False,
         )
-        all_placings = []
-        for bowstyle, age, gender in categories:
-            division = "{bow} {age} {gender}".format(
-                bow=bowstyle,
-                age=age,
-                gender=gender,
-            )
-            archers = (
-                ArcherSeason.objects.filter(season=season)
-                .annotate(
-                    event_count=Count("result"),
-                )
-                .filter(
-                    event_count__gte=3,
-                    age_group=age,
-                    archer__gender=gender,
-                    bowstyle=bowstyle,
-                    archer__is_scas_member=True,
-                )
-                .prefetch_related("result_set")
-                .select_related("season")
+        keys = {
+            division: self.get_division_cache_key(division, revision)
+            for division, revision in division_revisions(standings)
+        }
+        tables = cache.get_many(keys.values())
+        missing = [division for division, key in keys.items() if key not in tables]
+        if missing:
+            tables.update(self.render_divisions(standings, missing, keys))
+            timeout = settings.PAGE_CACHE_TIMEOUT if season.is_current else None
+            cache.set_many(
+                {keys[division]: tables[keys[division]] for division in missing},
+                timeout,
             )
-
-            placings = sorted(archers, key=lambda a: a.total_scayt_points, reverse=True)
-
-            placing = 0
-            current_total = None
-            placing_counter = 1
-            for archer in placings:
-                if archer.total_scayt_points == current_total:
-                    placing_counter += 1
-                else:
-                    current_total = archer.total_scayt_points
-                    placing += placing_counter
-                    placing_counter = 1
-                archer.placing = placing
-
-            if len(archers):
-                all_placings.append((division, placings))
-        context["all_placings"] = all_placings
+        context["all_placings"] = [tables[key] for key in keys.values()]
         return context
 
+    def get_division_cache_key(self, division, revision):
+        season_id, bowstyle, age_group, gender = division
+        return "scayt:final-standings:%s:%s:%s:%s:%s" % (
+            season_id,
+            bowstyle.value,
+            age_group.value,
+            gender.value,
+            revision,
+        )
 
-class DivisionStandings(SeasonMixin, TemplateView):
-    template_name = "scayt/division_standings.html"
+    def render_divisions(self, standings, divisions, keys):
+        """Render the tables of `divisions`, returning them by cache key."""
+        query = Q()
+        for _, bowstyle, age_group, gender in divisions:
+            query |= Q(bowstyle=bowstyle, age_group=age_group, gender=gender)
+        standings = (
+            standings.filter(query)
+            .select_related("archer_season__archer")
+            .order_by(
+                "bowstyle", "age_group", "gender", "final_placing", "archer_season_id"
+            )
+        )
+        tables = {}
+        for division, placings in itertools.groupby(
+            standings, key=lambda s: (s.season_id, s.bowstyle, s.age_group, s.gender)
+        ):
+            placings = list(placings)
+            tables[keys[division]] = render_to_string(
+                self.division_template_name,
+                {"division": placings[0].division, "placings": placings},
+            )
+        return tables
 
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        season = self.get_season()
-        context["season"] = season
+
+class DivisionMixin:
+    def get_division(self):
+        """Return the Standing filters for the division in the URL."""
         bowstyle = {
             "R": DbBowstyles.RECURVE,
             "C": DbBowstyles.COMPOUND,
@@ -171,48 +271,140 @@ class DivisionStandings(SeasonMixin, TemplateView):
             "M": DbGender.MALE,
             "W": DbGender.FEMALE,
         }[self.kwargs["gender"]]
-        age = DbAges["AGE_UNDER_%s" % self.kwargs["age"]]
-        context["division"] = "{bow} {age} {gender}".format(
-            bow=bowstyle,
-            age=age,
-            gender=gender,
-        )
-        archers = (
-            ArcherSeason.objects.filter(
-                season=season,
-                age_group=age,
-                archer__gender=gender,
-                bowstyle=bowstyle,
-            )
-            .prefetch_related("result_set")
-            .select_related("season")
-        )
-        context["placings"] = sorted(
-            archers, key=lambda a: a.total_scayt_points, reverse=True
-        )
+        try:
+            age = DbAges["AGE_UNDER_%s" % self.kwargs["age"]]
+        except KeyError:
+            raise Http404("Unknown age group: U%s" % self.kwargs["age"])
+        return {"bowstyle": bowstyle, "age_group": age, "gender": gender}
 
-        placing = 0
-        current_total = None
-        placing_counter = 1
-        for archer in context["placings"]:
-            if archer.total_scayt_points == current_total:
-                placing_counter += 1
-            else:
-                current_total = archer.total_scayt_points
-                placing += placing_counter
-                placing_counter = 1
-            archer.placing = placing
 
+class DivisionStandings(CachedPageMixin, SeasonMixin, DivisionMixin, TemplateView):
+    template_name = "scayt/division_standings.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        season = self.get_season()
+        context["season"] = season
+        division = self.get_division()
+        context["division"] = "{bowstyle} {age_group} {gender}".format(**division)
+        context["placings"] = Standing.objects.filter(
+            season=season, **division
+        ).select_related("archer_season__archer")
         return context
 
 
-class IndividualStandings(DetailView):
+class IndividualStandings(CachedPageMixin, DetailView):
     template_name = "scayt/individual_standings.html"
-    model = ArcherSeason
+    queryset = ArcherSeason.objects.with_results().select_related("archer")
+
+    def get_cache_season(self):
+        return Season.objects.filter(archerseason=self.kwargs["pk"]).first()
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context["current_season"] = Season.objects.first()
         context["season"] = self.object.season
         context["results"] = self.object.annotated_results
         return context
+
+
+class StandingsData(CachedPageMixin, SeasonMixin, View):
+    """Every division's standings for a season, as compact JSON.
+
+    `d` maps each division, named as in its URL, to rows of the `c` columns.
+    Archer names are listed once in `n`, with rows giving their index in it,
+    and `id` is the archer season for links to individual standings.
+    """
+
+    columns = ["placing", "final", "archer", "id", "points", "events"]
+
+    def get_cache_season(self):
+        return self.get_season_or_404()
+
+    def get(self, request, *args, **kwargs):
+        season = self.get_season_or_404()
+        standings = (
+            Standing.objects.filter(season=season)
+            .select_related("archer_season__archer")
+            .order_by("bowstyle", "age_group", "gender", "placing", "archer_season_id")
+        )
+        names = {}
+        divisions = {}
+        for standing in standings:
+            division = division_slug(
+                standing.bowstyle, standing.age_group, standing.gender
+            )
+            if division is None:
+                continue
+            archer = standing.archer_season.archer
+            if archer.pk not in names:
+                names[archer.pk] = (len(names), str(archer))
+            points = round(standing.total_points, 2)
+            divisions.setdefault(division, []).append(
+                [
+                    standing.placing,
+                    standing.final_placing,
+                    names[archer.pk][0],
+                    standing.archer_season_id,
+                    int(points) if points.is_integer() else points,
+                    standing.event_count,
+                ]
+            )
+        data = {
+            "y": season.year,
+            "c": self.columns,
+            "n": [name for index, name in names.values()],
+            "d": divisions,
+        }
+        return JsonResponse(data, json_dumps_params={"separators": (",", ":")})
+
+
+class StandingsExport(SeasonMixin, DivisionMixin, View):
+    """A season's standings, optionally for one division, as CSV or JSON."""
+
+    def get(self, request, *args, **kwargs):
+        season = self.get_season_or_404()
+        standings = Standing.objects.filter(season=season)
+        filename = "scayt-%s-standings" % season.year
+        if "bow" in self.kwargs:
+            standings = standings.filter(**self.get_division())
+            filename += "-%(bow)sU%(age)s%(gender)s" % self.kwargs
+        standings = standings.order_by(
+            "bowstyle", "age_group", "gender", "placing", "archer_season_id"
+        )
+        return exports.export_response(
+            filename,
+            self.kwargs["format"],
+            exports.STANDING_COLUMNS,
+            exports.standing_rows(standings),
+        )
+
+
+class ResultsExport(View):
+    """Results of one event, one season, or every season, as CSV or JSON."""
+
+    def get(self, request, *args, **kwargs):
+        results = Result.objects.all()
+        filename = "scayt-results"
+        if "pk" in self.kwargs:
+            event = get_object_or_404(Event, pk=self.kwargs["pk"])
+            results = results.filter(event=event)
+            filename = "scayt-results-%s" % slugify(event.name)
+        elif "year" in self.kwargs:
+            season = get_object_or_404(Season, year=self.kwargs["year"])
+            results = results.filter(event__season=season)
+            filename = "scayt-%s-results" % season.year
+        results = results.order_by(
+            "-event__season__year",
+            "event__date",
+            "event_id",
+            "archer_season__bowstyle",
+            "age_group_competed",
+            "archer_season__archer__gender",
+            "placing",
+        )
+        return exports.export_response(
+            filename,
+            self.kwargs["format"],
+            exports.RESULT_COLUMNS,
+            exports.result_rows(results),
+        )